@@ -0,0 +1,435 @@
+"""Load and soak test harness for the scoring API.
+
+Starts the app (as a separate uvicorn process, or in-process) with the
+LanguageTool grammar backend replaced by a local stub, drives /score and
+/analytics/download (and /rubric on request) at the configured concurrency and
+transcript sizes, and reports throughput plus p50/p95/p99 latency.
+Exits non-zero when any scenario breaks the SLO thresholds.
+
+In-process mode shares one interpreter (and GIL) between the load
+generator and the app, so its numbers are lower than and not comparable
+with the default subprocess mode.
+
+Usage:
+    python loadtest.py
+    python loadtest.py --concurrency 1,8,32 --words 100,500,2000
+    python loadtest.py --soak 600 --concurrency 8 --words 300
+    python loadtest.py --compare loadtest_results/2.0.0-20261019T120000.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_PATH = os.path.join(os.path.dirname(BASE_DIR), "Sample text for case study.txt")
+RESULTS_DIR = Path(BASE_DIR) / "loadtest_results"
+
+# Report fields that must match for a baseline diff to be meaningful
+COMPARABLE_FIELDS = [
+    "mode", "grammar_backend", "grammar_latency_ms",
+    "requests_per_scenario", "soak_sec", "analytics_log_lines",
+]
+
+# /rubric is left out of the default profile: it currently returns 500 because the
+# loaded rubric contains NaN/inf values that cannot be JSON-encoded
+ENDPOINTS = ["/score", "/analytics/download"]
+
+
+class StubGrammarTool:
+    """Stands in for language_tool_python.LanguageTool so runs never hit the public API."""
+
+    def __init__(self, *args, latency_ms: float = 0, **kwargs):
+        self.latency_ms = latency_ms
+
+    def check(self, text):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return []
+
+
+def stub_grammar_backend(latency_ms: float = 0):
+    import language_tool_python
+
+    def factory(*args, **kwargs):
+        return StubGrammarTool(*args, latency_ms=latency_ms, **kwargs)
+
+    language_tool_python.LanguageTool = factory
+
+
+def load_app(log_root, grammar_latency_ms: float = 0):
+    stub_grammar_backend(grammar_latency_ms)
+    sys.path.insert(0, BASE_DIR)
+    # main.py creates ./logs on import and appends to it on every request; keep
+    # synthetic traffic out of the real access log that /analytics/download serves
+    prev_cwd = os.getcwd()
+    os.chdir(log_root)
+    try:
+        import main
+    finally:
+        os.chdir(prev_cwd)
+    main.LOGS_DIR = Path(log_root) / "logs"
+    main.ACCESS_LOG_FILE = main.LOGS_DIR / "access.log"
+    # main.py logs twice per /score at INFO; that output would dominate the console and the timings
+    main.logger.setLevel(logging.WARNING)
+    return main.app
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_healthy(base_url, server=None, timeout_sec=60):
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        if server and server.exited():
+            raise RuntimeError(f"Server at {base_url} exited during startup")
+        try:
+            health = requests.get(f"{base_url}/health", timeout=2).json()
+        except requests.RequestException:
+            time.sleep(0.2)
+            continue
+        if health.get("scorer_initialized"):
+            return
+        # The scorer is built once at import time, so a failure here is final
+        raise RuntimeError(f"Scorer at {base_url} failed to initialize: {health.get('error')}")
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout_sec}s")
+
+
+class InProcessServer:
+    def __init__(self, port, log_root, grammar_latency_ms):
+        import uvicorn
+
+        config = uvicorn.Config(load_app(log_root, grammar_latency_ms), host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def exited(self):
+        return not self.thread.is_alive()
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class SubprocessServer:
+    def __init__(self, port, log_root, grammar_latency_ms):
+        self.cmd = [
+            sys.executable, os.path.abspath(__file__), "--serve",
+            "--port", str(port), "--log-root", log_root,
+            "--grammar-latency-ms", str(grammar_latency_ms),
+        ]
+        self.log_root = log_root
+        self.proc = None
+
+    def start(self):
+        self.proc = subprocess.Popen(self.cmd, cwd=self.log_root)
+
+    def exited(self):
+        return self.proc.poll() is not None
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def serve(port, log_root, grammar_latency_ms):
+    import uvicorn
+
+    uvicorn.run(load_app(log_root, grammar_latency_ms), host="127.0.0.1", port=port, log_level="warning")
+
+
+def build_transcript(word_count):
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        sample = f.read().split()
+    repeats = word_count // len(sample) + 1
+    return " ".join((sample * repeats)[:word_count])
+
+
+def seed_access_log(log_root, line_count):
+    """Replace the harnessed server's access log with a fixed number of synthetic entries.
+
+    /analytics/download parses the whole log on every call, so its latency is only
+    comparable across runs when the log it reads has the same size.
+    """
+    log_file = Path(log_root) / "logs" / "access.log"
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    start = datetime(2025, 1, 1)
+    with open(log_file, "w", encoding="utf-8") as f:
+        for i in range(line_count):
+            entry = {
+                "timestamp": start.replace(second=i % 60).isoformat(),
+                "ip_hash": f"{i % 256:08x}",
+                "method": "POST" if i % 2 == 0 else "GET",
+                "path": "/score" if i % 2 == 0 else "/health",
+                "status": 200,
+                "duration_ms": 10.0,
+            }
+            f.write(json.dumps(entry) + "\n")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank method: no interpolation, always a latency that was observed
+    idx = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[idx]
+
+
+def run_scenario(base_url, endpoint, concurrency, words, total_requests, soak_sec):
+    payload = {"transcript": build_transcript(words)} if endpoint == "/score" else None
+    sessions = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + soak_sec if soak_sec else None
+    remaining = [total_requests]
+
+    def next_ticket():
+        with lock:
+            if deadline is not None:
+                return time.monotonic() < deadline
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker():
+        nonlocal errors
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        while next_ticket():
+            start = time.perf_counter()
+            try:
+                if payload is not None:
+                    resp = sessions.session.post(f"{base_url}{endpoint}", json=payload, timeout=120)
+                else:
+                    resp = sessions.session.get(f"{base_url}{endpoint}", timeout=120)
+                ok = resp.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies.append(elapsed_ms)
+                else:
+                    errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        for future in futures:
+            future.result()
+    wall_sec = time.perf_counter() - started
+
+    latencies.sort()
+    completed = len(latencies) + errors
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "words": words if endpoint == "/score" else None,
+        "requests": completed,
+        "errors": errors,
+        "error_rate": round(errors / completed, 4) if completed else 0.0,
+        "duration_sec": round(wall_sec, 3),
+        "throughput_rps": round(len(latencies) / wall_sec, 2) if wall_sec else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+def check_slo(result, slo):
+    breaches = []
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        if slo[key] is not None and result[key] > slo[key]:
+            breaches.append(f"{key} {result[key]} > {slo[key]}")
+    if slo["min_rps"] is not None and result["throughput_rps"] < slo["min_rps"]:
+        breaches.append(f"throughput_rps {result['throughput_rps']} < {slo['min_rps']}")
+    if result["error_rate"] > slo["max_error_rate"]:
+        breaches.append(f"error_rate {result['error_rate']} > {slo['max_error_rate']}")
+    return breaches
+
+
+def scenario_key(result):
+    return f"{result['endpoint']} c={result['concurrency']} words={result['words']}"
+
+
+def print_results(results, baseline=None):
+    baseline_by_key = {scenario_key(r): r for r in baseline["results"]} if baseline else {}
+    header = f"{'scenario':<40} {'reqs':>6} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}  SLO"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        status = "FAIL" if r["slo_breaches"] else "ok"
+        print(f"{scenario_key(r):<40} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>9} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}  {status}")
+        prev = baseline_by_key.get(scenario_key(r))
+        if prev:
+            print(f"{'  vs baseline':<40} {'':>6} {'':>5} {r['throughput_rps'] - prev['throughput_rps']:>+9.2f} "
+                  f"{r['p50_ms'] - prev['p50_ms']:>+9.2f} {r['p95_ms'] - prev['p95_ms']:>+9.2f} "
+                  f"{r['p99_ms'] - prev['p99_ms']:>+9.2f}")
+        for breach in r["slo_breaches"]:
+            print(f"    SLO breach: {breach}")
+
+
+def comparability_warnings(report, baseline):
+    warnings = []
+    for field in COMPARABLE_FIELDS:
+        if report.get(field) != baseline.get(field):
+            warnings.append(f"{field}: {report.get(field)!r} (baseline {baseline.get(field)!r})")
+    return warnings
+
+
+def save_results(report, output):
+    if output:
+        path = Path(output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        path = RESULTS_DIR / f"{report['app_version']}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load and soak test the scoring API")
+    parser.add_argument("--mode", choices=["subprocess", "inprocess"], default="subprocess",
+                        help="Run uvicorn as a separate process, or in a background thread of this one "
+                             "(in-process results compete with the load generator for the GIL)")
+    parser.add_argument("--url", help="Target an already running server instead of starting one (grammar backend is not stubbed)")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated endpoints to drive")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4, 16], help="Comma-separated concurrency levels")
+    parser.add_argument("--words", type=parse_int_list, default=[50, 300, 1500], help="Comma-separated /score transcript sizes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--soak", type=float, default=0, help="Run each scenario for this many seconds instead of a fixed request count")
+    parser.add_argument("--grammar-latency-ms", type=float, default=0, help="Simulated latency of the stubbed grammar backend")
+    parser.add_argument("--analytics-log-lines", type=int, default=1000,
+                        help="Access log entries seeded before each /analytics/download scenario")
+    parser.add_argument("--slo-p50-ms", type=float, default=None)
+    parser.add_argument("--slo-p95-ms", type=float, default=1000)
+    parser.add_argument("--slo-p99-ms", type=float, default=2000)
+    parser.add_argument("--slo-min-rps", type=float, default=None)
+    parser.add_argument("--slo-max-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Where to write the JSON report (default: loadtest_results/<version>-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--log-root", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.serve:
+        serve(args.port, args.log_root, args.grammar_latency_ms)
+        return 0
+
+    server = None
+    log_root = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = args.port or free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        log_root = tempfile.mkdtemp(prefix="loadtest-")
+        server_cls = InProcessServer if args.mode == "inprocess" else SubprocessServer
+        server = server_cls(port, log_root, args.grammar_latency_ms)
+        server.start()
+
+    slo = {
+        "p50_ms": args.slo_p50_ms,
+        "p95_ms": args.slo_p95_ms,
+        "p99_ms": args.slo_p99_ms,
+        "min_rps": args.slo_min_rps,
+        "max_error_rate": args.slo_max_error_rate,
+    }
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+
+    results = []
+    try:
+        wait_until_healthy(base_url, server)
+        app_version = requests.get(f"{base_url}/openapi.json", timeout=5).json()["info"]["version"]
+        for endpoint in endpoints:
+            sizes = args.words if endpoint == "/score" else [None]
+            for words in sizes:
+                for concurrency in args.concurrency:
+                    if endpoint == "/analytics/download" and log_root:
+                        # Reseed per scenario so neither /score traffic from this run
+                        # nor earlier analytics calls change the size of the log read
+                        seed_access_log(log_root, args.analytics_log_lines)
+                    print(f"Running {endpoint} concurrency={concurrency}" + (f" words={words}" if words else ""))
+                    result = run_scenario(base_url, endpoint, concurrency, words, args.requests, args.soak)
+                    result["slo_breaches"] = check_slo(result, slo)
+                    results.append(result)
+    finally:
+        if server:
+            server.stop()
+        if log_root:
+            shutil.rmtree(log_root, ignore_errors=True)
+
+    report = {
+        "app_version": app_version,
+        "timestamp": datetime.now().isoformat(),
+        "mode": "external" if args.url else args.mode,
+        "grammar_backend": "live" if args.url else "stub",
+        "grammar_latency_ms": args.grammar_latency_ms,
+        "requests_per_scenario": None if args.soak else args.requests,
+        "soak_sec": args.soak or None,
+        "analytics_log_lines": None if args.url else args.analytics_log_lines,
+        "slo": slo,
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatches = comparability_warnings(report, baseline)
+        if mismatches:
+            print(f"\nWARNING: run settings differ from baseline {args.compare}; deltas may not be meaningful")
+            for mismatch in mismatches:
+                print(f"    {mismatch}")
+
+    print_results(results, baseline)
+    path = save_results(report, args.output)
+    print(f"\nReport written to {path}")
+
+    failed = [r for r in results if r["slo_breaches"]]
+    if failed:
+        print(f"{len(failed)} of {len(results)} scenarios breached the SLO")
+        return 1
+    print("All scenarios within SLO")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())